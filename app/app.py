@@ -1,14 +1,32 @@
 import os
-from flask import Flask, request, send_file, jsonify, send_from_directory
+import io
+import json
+import mmap
+import shutil
+import hashlib
+import uuid
+import zipfile
+import threading
+import concurrent.futures
+from flask import Flask, Response, request, send_file, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.targets import FileTarget, ValueTarget
+from streaming_form_data.validators import MaxSizeValidator, ValidationError
 import tempfile
 import logging
+import importlib
 
-# Import the non-rawpy version of the converter
-from app.services.converter_no_rawpy import ImageConverter
 from app.utils.format_validator import is_valid_format, get_supported_output_formats
 
+# The two converter backends (rawpy and the no-rawpy fallback) expose the
+# same ImageConverter API; pick one via env var instead of hard-coding the
+# import, so hosts where rawpy installs cleanly can switch without a code
+# change and only one backend module is ever imported.
+_CONVERTER_BACKEND = os.environ.get('CONVERTER_BACKEND', 'app.services.converter_no_rawpy')
+ImageConverter = importlib.import_module(_CONVERTER_BACKEND).ImageConverter
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,15 +38,240 @@ CORS(app)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload size
 app.config['UPLOAD_FOLDER'] = tempfile.gettempdir()
 
+# Pool for running conversions off the request thread. The native
+# decode/encode stages release the GIL, so concurrent requests overlap
+# across cores instead of serializing on the worker thread.
+CONVERT_WORKERS = int(os.environ.get('CONVERT_WORKERS', os.cpu_count() or 4))
+EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=CONVERT_WORKERS)
+
+# Bound queued plus in-flight conversions. Request threads take a slot
+# before submitting, so a burst of large uploads blocks at admission
+# instead of growing the executor queue (and the memory pinned by the
+# inputs it references) without limit.
+_CONVERT_SLOTS = threading.BoundedSemaphore(CONVERT_WORKERS * 2)
+
+def _save_upload(file, input_path):
+    """Persist an uploaded FileStorage without small-buffer copying.
+
+    FileStorage.save copies through Python in 16KB chunks. When the
+    spooled upload is backed by a real file descriptor, hand the copy to
+    the kernel with os.sendfile; otherwise fall back to copyfileobj with
+    a 1MiB buffer.
+    """
+    with open(input_path, 'wb') as dst:
+        src = file.stream
+        try:
+            size = os.fstat(src.fileno()).st_size
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+                if not sent:
+                    break
+                offset += sent
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            shutil.copyfileobj(src, dst, length=1 << 20)
+
+def _rm(path):
+    """Remove a temp file with a single unlink, ignoring absence.
+    
+    Skips the os.path.exists stat that used to precede every removal.
+    """
+    try:
+        os.unlink(path)
+    except (FileNotFoundError, TypeError):
+        pass
+
+def _output_tmpfile(suffix):
+    """Create the temp file a conversion writes its output into.
+    
+    On Linux the file is an anonymous O_TMPFILE inode with no directory
+    entry: the converter writes to it through its /proc/<pid>/fd path and
+    the inode vanishes when the descriptor closes, so the hot path skips
+    both the dirent creation and the later unlink. Falls back to mkstemp
+    where O_TMPFILE is unavailable.
+    
+    Returns (file object, path for the converter to write to).
+    """
+    if hasattr(os, 'O_TMPFILE'):
+        try:
+            fd = os.open(app.config['UPLOAD_FOLDER'], os.O_TMPFILE | os.O_RDWR, 0o600)
+            return os.fdopen(fd, 'rb+'), f"/proc/{os.getpid()}/fd/{fd}"
+        except OSError:
+            pass  # filesystem without O_TMPFILE support
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    return os.fdopen(fd, 'rb+'), path
+
+def _run_conversion(converter, input_path, output_path, target_format, quality):
+    """Run a single conversion job on the executor.
+    
+    Callers must hold a _CONVERT_SLOTS slot across the submit; acquiring
+    here would be a no-op, since the executor itself never runs more
+    than CONVERT_WORKERS jobs at once.
+    """
+    return converter.convert(input_path, output_path, target_format, quality)
+
+# ImageConverter holds no per-conversion state, so one shared instance
+# serves every request instead of being rebuilt per call. warmup() forces
+# lazy library/plugin initialization now rather than on the first request.
+_CONVERTER = ImageConverter()
+ImageConverter.warmup()
+
+# The supported-format tables are static, so compute the /formats response
+# once at import time instead of rebuilding it on every request.
+_FORMATS = get_supported_output_formats()
+_FORMATS_BODY = json.dumps({
+    "input_formats": list(_FORMATS),
+    "output_formats": dict(_FORMATS)
+}).encode()
+
+# Content-addressed cache of converted outputs. Identical uploads are
+# common (client retries, repeated assets); a repeat request for the same
+# (content, target format, quality) is served straight from disk.
+CACHE_DIR = os.environ.get(
+    'CONVERT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'converter-cache'))
+CACHE_MAX_ENTRIES = int(os.environ.get('CONVERT_CACHE_MAX', 256))
+os.makedirs(CACHE_DIR, exist_ok=True)
+
+class _HashingFileTarget(FileTarget):
+    """FileTarget that fingerprints the upload while it streams to disk."""
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.digest = hashlib.blake2b(digest_size=32)
+
+    def on_data_received(self, chunk):
+        self.digest.update(chunk)
+        super().on_data_received(chunk)
+
+def _cache_store(output_file, cache_path):
+    """Copy a finished conversion into the cache (best effort)."""
+    tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, 'wb') as dst:
+            output_file.seek(0)
+            shutil.copyfileobj(output_file, dst, length=1 << 20)
+        output_file.seek(0)
+        os.replace(tmp_path, cache_path)
+        _cache_evict()
+    except OSError as e:
+        logger.warning(f"Could not cache conversion result: {str(e)}")
+        _rm(tmp_path)
+
+def _cache_evict():
+    """Drop least-recently-used cache entries beyond the size cap."""
+    try:
+        entries = [os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR)]
+        if len(entries) <= CACHE_MAX_ENTRIES:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - CACHE_MAX_ENTRIES]:
+            os.remove(path)
+    except OSError:
+        pass
+
+class _InvalidField(Exception):
+    """Raised mid-parse to abort an upload over an invalid form field."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+class _ValidatingValueTarget(ValueTarget):
+    """ValueTarget that validates its value the moment its part ends.
+    
+    Raising from on_finish aborts the multipart read loop, so a bad
+    target_format or quality is rejected without reading (and writing)
+    the rest of the upload first.
+    """
+
+    def __init__(self, validate_value, **kwargs):
+        super().__init__(**kwargs)
+        self._validate_value = validate_value
+
+    def on_finish(self):
+        super().on_finish()
+        self._validate_value(self.value)
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """Unseekable write sink that lets zipfile output be streamed.
+    
+    zipfile writes archive bytes into this buffer; drain() hands the
+    accumulated bytes to the response generator so finished members go
+    out on the wire while later conversions are still running.
+    """
+    def __init__(self):
+        self._chunks = []
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return b''.join(chunks)
+
+# Formats PIL decodes directly; uploads with these extensions can be
+# handed to the converter as an mmap'd buffer instead of a path.
+_MMAP_FORMATS = {'jpg', 'jpeg', 'png', 'gif', 'webp', 'tif', 'tiff', 'bmp'}
+
+# MIME types for the download response, keyed by target format
+MIME_TYPES = {
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+    'tiff': 'image/tiff',
+    'bmp': 'image/bmp',
+    'svg': 'image/svg+xml',
+    'pdf': 'application/pdf',
+    'eps': 'application/postscript'
+}
+
+# Pre-encoded bodies for the fixed error messages, so the hot 4xx paths
+# skip jsonify/json.dumps entirely. A fresh Response is built per request
+# because after-request hooks (CORS) mutate response headers in place.
+_ERR_NO_IMAGE = b'{"error":"No image provided"}'
+_ERR_NO_FILE = b'{"error":"No selected file"}'
+_ERR_NO_IMAGES = b'{"error":"No images provided"}'
+_ERR_NO_TARGET_FORMAT = b'{"error":"No target format specified"}'
+_ERR_BAD_QUALITY = b'{"error":"Quality must be an integer between 1 and 100"}'
+_ERR_TOO_LARGE = b'{"error":"Uploaded file is too large"}'
+_ERR_NOT_MULTIPART = b'{"error":"Content-Type must be multipart/form-data"}'
+
+def _error(body, status=400):
+    """Build a JSON error response from a pre-encoded body."""
+    return Response(body, status=status, mimetype='application/json')
+
+@app.before_request
+def _upload_preflight():
+    """Reject bad uploads from the headers alone, before reading the body.
+    
+    Werkzeug only enforces MAX_CONTENT_LENGTH while consuming the body;
+    checking the declared Content-Length (and the multipart Content-Type)
+    here closes the connection before the client transfers anything.
+    """
+    if request.method == 'POST' and request.path in ('/convert', '/convert_batch'):
+        try:
+            declared = int(request.headers.get('Content-Length', 0))
+        except ValueError:
+            declared = 0
+        if declared > app.config['MAX_CONTENT_LENGTH']:
+            return _error(_ERR_TOO_LARGE, 413)
+        if request.mimetype != 'multipart/form-data':
+            return _error(_ERR_NOT_MULTIPART, 415)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({"status": "healthy"}), 200
 
-@app.route('/', methods=['GET'])
-def index():
-    """Serve a simple HTML form for testing the API"""
-    html = """
+# The landing page and advanced UI are static, so encode them once at
+# import time instead of materializing a multi-KB string per request.
+_INDEX_HTML = ("""
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -133,125 +376,325 @@ def index():
         </div>
     </body>
     </html>
-    """
-    return html
+    """).encode('utf-8')
+
+try:
+    with open('app/templates/advanced.html', 'rb') as _f:
+        _ADVANCED_HTML = _f.read()
+except FileNotFoundError:
+    _ADVANCED_HTML = None
+
+@app.route('/', methods=['GET'])
+def index():
+    """Serve a simple HTML form for testing the API"""
+    return Response(_INDEX_HTML, mimetype='text/html',
+                    headers={'Cache-Control': 'public, max-age=3600'})
 
 @app.route('/advanced', methods=['GET'])
 def advanced():
     """Serve the advanced HTML interface"""
-    try:
-        with open('app/templates/advanced.html', 'r') as f:
-            return f.read()
-    except FileNotFoundError:
+    if _ADVANCED_HTML is None:
         return "Advanced template not found", 404
+    return Response(_ADVANCED_HTML, mimetype='text/html',
+                    headers={'Cache-Control': 'public, max-age=3600'})
 
 @app.route('/formats', methods=['GET'])
 def get_formats():
     """Get all supported formats"""
-    input_formats = list(get_supported_output_formats().keys())
-    output_formats = {}
-    
-    for input_format in input_formats:
-        output_formats[input_format] = get_supported_output_formats()[input_format]
-    
-    return jsonify({
-        "input_formats": input_formats,
-        "output_formats": output_formats
-    }), 200
+    return Response(_FORMATS_BODY, mimetype='application/json')
 
 @app.route('/convert', methods=['POST'])
 def convert_image():
     """Convert an image from one format to another"""
-    # Check if the post request has the file part
-    if 'image' not in request.files:
-        return jsonify({"error": "No image provided"}), 400
-    
-    file = request.files['image']
-    
-    # If user does not select file, browser also
-    # submit an empty part without filename
-    if file.filename == '':
-        return jsonify({"error": "No selected file"}), 400
-    
+    # Stream the multipart body straight to disk instead of letting Werkzeug
+    # buffer the whole upload before we get to see it. The file part is
+    # written to its temporary path as the bytes arrive on the socket.
+    # Temp files are named after a per-request UUID so concurrent uploads
+    # of identically named files can never clobber each other.
+    unique = uuid.uuid4().hex
+    input_path = os.path.join(app.config['UPLOAD_FOLDER'], unique)
+    file_target = _HashingFileTarget(
+        input_path,
+        validator=MaxSizeValidator(app.config['MAX_CONTENT_LENGTH'])
+    )
+    def _check_target_format(value):
+        fmt = value.decode() if value else None
+        if not fmt:
+            raise _InvalidField(_error(_ERR_NO_TARGET_FORMAT))
+        if not is_valid_format(fmt):
+            raise _InvalidField((jsonify({"error": f"Unsupported target format: {fmt}"}), 400))
+
+    def _check_quality(value):
+        try:
+            q = int(value.decode()) if value else 90
+            if q < 1 or q > 100:
+                raise ValueError("Quality must be between 1 and 100")
+        except ValueError:
+            raise _InvalidField(_error(_ERR_BAD_QUALITY))
+
+    format_target = _ValidatingValueTarget(_check_target_format)
+    quality_target = _ValidatingValueTarget(_check_quality)
+
+    parser = StreamingFormDataParser(headers=request.headers)
+    parser.register('image', file_target)
+    parser.register('target_format', format_target)
+    parser.register('quality', quality_target)
+
+    try:
+        # 1MiB reads keep the syscall count low for large uploads
+        while chunk := request.stream.read(1 << 20):
+            parser.data_received(chunk)
+    except ValidationError:
+        _rm(input_path)
+        return _error(_ERR_TOO_LARGE, 413)
+    except _InvalidField as e:
+        # Invalid field seen before the file part finished uploading
+        _rm(input_path)
+        return e.response
+
+    # Check if the post request had the file part
+    if not file_target.multipart_filename:
+        _rm(input_path)
+        return _error(_ERR_NO_IMAGE)
+
+    # Re-attach the sanitized original extension now that the filename is
+    # known: format detection falls back to it for formats without a
+    # sniffable signature (tga, pcx, jxr, dxf, some raws), and the DXF
+    # fallback keys off the suffix.
+    ext = os.path.splitext(secure_filename(file_target.multipart_filename))[1].lower()
+    if ext:
+        os.rename(input_path, input_path + ext)
+        input_path += ext
+
     # Get target format
-    target_format = request.form.get('target_format')
+    target_format = format_target.value.decode() if format_target.value else None
     if not target_format:
-        return jsonify({"error": "No target format specified"}), 400
-    
+        _rm(input_path)
+        return _error(_ERR_NO_TARGET_FORMAT)
+
     # Validate target format
     if not is_valid_format(target_format):
+        _rm(input_path)
         return jsonify({"error": f"Unsupported target format: {target_format}"}), 400
-    
+
     # Get quality parameter (optional)
-    quality = request.form.get('quality', 90)
+    quality = quality_target.value.decode() if quality_target.value else 90
     try:
         quality = int(quality)
         if quality < 1 or quality > 100:
             raise ValueError("Quality must be between 1 and 100")
     except ValueError:
-        return jsonify({"error": "Quality must be an integer between 1 and 100"}), 400
-    
-    # Save the uploaded file temporarily
-    filename = secure_filename(file.filename)
-    input_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    file.save(input_path)
-    
+        _rm(input_path)
+        return _error(_ERR_BAD_QUALITY)
+
+    # The original basename is only used (sanitized and truncated) for the
+    # download name, never for anything touching the filesystem.
+    orig_stem = os.path.splitext(secure_filename(file_target.multipart_filename))[0][:32]
+    output_filename = f"{orig_stem or 'converted'}.{target_format}"
+    mime_type = MIME_TYPES.get(target_format, 'application/octet-stream')
+
+    # A repeat upload converts to byte-identical output, so serve it from
+    # the content-addressed cache and skip the conversion entirely. The
+    # claimed extension joins the key because detection falls back to it
+    # for formats without magic bytes -- identical bytes uploaded under
+    # different names can convert differently.
+    cache_path = os.path.join(
+        CACHE_DIR,
+        f"{file_target.digest.hexdigest()}.{ext.lstrip('.') or 'noext'}."
+        f"{target_format}.{quality}")
+    if os.path.exists(cache_path):
+        _rm(input_path)
+        os.utime(cache_path)  # keep hot entries from being evicted
+        response = send_file(
+            cache_path,
+            as_attachment=True,
+            download_name=output_filename,
+            mimetype=mime_type,
+            conditional=True
+        )
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        # The payload is already compressed; stop proxies from re-encoding it
+        response.headers["Cache-Control"] = "no-transform"
+        return response
+
     try:
         # Create a temporary file for the output
-        output_fd, output_path = tempfile.mkstemp(suffix=f'.{target_format}')
-        os.close(output_fd)
-        
-        # Convert the image
-        converter = ImageConverter()
-        converter.convert(input_path, output_path, target_format, quality)
-        
-        # Generate a meaningful filename for the download
-        output_filename = f"{os.path.splitext(filename)[0]}.{target_format}"
+        output_file, output_path = _output_tmpfile(f'.{target_format}')
         
-        # Get the MIME type for the target format
-        mime_types = {
-            'jpg': 'image/jpeg',
-            'jpeg': 'image/jpeg',
-            'png': 'image/png',
-            'gif': 'image/gif',
-            'webp': 'image/webp',
-            'tiff': 'image/tiff',
-            'bmp': 'image/bmp',
-            'svg': 'image/svg+xml',
-            'pdf': 'application/pdf',
-            'eps': 'application/postscript'
-        }
-        mime_type = mime_types.get(target_format, 'application/octet-stream')
+        # Convert the image on the executor so concurrent requests overlap.
+        # Standard formats are memory-mapped so PIL reads the upload
+        # straight from the page cache instead of through buffered I/O.
+        ext = os.path.splitext(file_target.multipart_filename)[1].lower().lstrip('.')
+        converted = False
+        if ext in _MMAP_FORMATS and os.path.getsize(input_path) > 0:
+            try:
+                with open(input_path, 'rb') as f, \
+                        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                        _CONVERT_SLOTS:
+                    EXECUTOR.submit(_run_conversion, _CONVERTER, mm, output_path,
+                                    target_format, quality).result()
+                converted = True
+            except ValueError as e:
+                # The extension lied (SVG bytes named .png, HEIF named
+                # .jpg, ...): retry from the temp file, where conversion
+                # detects the format content-first
+                logger.warning(f"Buffer conversion failed, retrying from path: {str(e)}")
+        if not converted:
+            with _CONVERT_SLOTS:
+                EXECUTOR.submit(_run_conversion, _CONVERTER, input_path, output_path,
+                                target_format, quality).result()
         
-        # Send the converted file with headers optimized for download
+        # Remember the result for identical future uploads
+        _cache_store(output_file, cache_path)
+
+        # Send the converted file with headers optimized for download.
+        # conditional=True lets the WSGI server use wsgi.file_wrapper
+        # (sendfile) instead of copying the payload through Python.
         response = send_file(
-            output_path,
+            output_file,
             as_attachment=True,  # Force download rather than display in browser
             download_name=output_filename,
-            mimetype=mime_type
+            mimetype=mime_type,
+            conditional=True
         )
-        
-        # Add headers to encourage direct download
-        response.headers["Content-Disposition"] = f"attachment; filename={output_filename}"
-        response.headers["Content-Type"] = mime_type
         response.headers["X-Content-Type-Options"] = "nosniff"
-        
+        # The payload is already compressed; stop proxies from re-encoding it
+        response.headers["Cache-Control"] = "no-transform"
+
+        # Clean up only once the response has been fully sent, so send_file
+        # can stream the file instead of having to read it eagerly. Closing
+        # the output descriptor deletes the anonymous inode.
+        response.call_on_close(lambda: _rm(input_path))
+        response.call_on_close(output_file.close)
+        if not output_path.startswith('/proc/'):
+            response.call_on_close(lambda: _rm(output_path))
+
         return response
     except Exception as e:
         logger.error(f"Conversion error: {str(e)}")
+        # Clean up temporary files on failure
+        _rm(input_path)
+        if 'output_file' in locals():
+            output_file.close()
+            if not output_path.startswith('/proc/'):
+                _rm(output_path)
+        return jsonify({"error": f"Conversion failed: {str(e)}"}), 500
+
+@app.route('/convert_batch', methods=['POST'])
+def convert_batch():
+    """Convert multiple images in one request and return them as a zip"""
+    files = request.files.getlist('images')
+    if not files:
+        return _error(_ERR_NO_IMAGES)
+
+    target_format = request.form.get('target_format')
+    if not target_format:
+        return _error(_ERR_NO_TARGET_FORMAT)
+    if not is_valid_format(target_format):
+        return jsonify({"error": f"Unsupported target format: {target_format}"}), 400
+
+    quality = request.form.get('quality', 90)
+    try:
+        quality = int(quality)
+        if quality < 1 or quality > 100:
+            raise ValueError("Quality must be between 1 and 100")
+    except ValueError:
+        return _error(_ERR_BAD_QUALITY)
+
+    jobs = []
+    temp_paths = []
+    try:
+        # Save each upload and fan the conversions out on the executor
+        for file in files:
+            if not file.filename:
+                continue
+            # Keep the sanitized extension on the temp name so detection
+            # can fall back to it for formats without magic bytes
+            ext = os.path.splitext(secure_filename(file.filename))[1].lower()
+            unique = uuid.uuid4().hex
+            input_path = os.path.join(app.config['UPLOAD_FOLDER'], unique + ext)
+            _save_upload(file, input_path)
+            output_fd, output_path = tempfile.mkstemp(prefix=unique, suffix=f'.{target_format}')
+            os.close(output_fd)
+            temp_paths.extend([input_path, output_path])
+
+            orig_stem = os.path.splitext(secure_filename(file.filename))[0][:32]
+            output_filename = f"{orig_stem or 'converted'}.{target_format}"
+            # Each queued job holds a slot until it finishes, so huge
+            # batches block here rather than flooding the executor queue
+            _CONVERT_SLOTS.acquire()
+            future = EXECUTOR.submit(_run_conversion, _CONVERTER, input_path,
+                                     output_path, target_format, quality)
+            future.add_done_callback(lambda _f: _CONVERT_SLOTS.release())
+            jobs.append((future, output_path, output_filename))
+
+        if not jobs:
+            return _error(_ERR_NO_FILE)
+
+        # Resolve the first conversion before the streamed response is
+        # constructed: once streaming starts a failure can only truncate
+        # the body, but at this point a wholly-failed batch still gets a
+        # real 500 instead of an empty 200 zip.
+        jobs[0][0].result()
+
+        # Stream the zip as conversions complete: each finished member is
+        # shipped to the client while the remaining files are still being
+        # converted, so encode CPU overlaps network transfer and only one
+        # member is buffered at a time.
+        def generate():
+            buffer = _ZipStreamBuffer()
+            try:
+                with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as zf:
+                    for future, output_path, output_filename in jobs:
+                        future.result()
+                        zf.write(output_path, arcname=output_filename)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+                data = buffer.drain()
+                if data:
+                    yield data
+            except Exception as e:
+                # Too late for a 500 once streaming has started
+                logger.error(f"Batch conversion error: {str(e)}")
+            finally:
+                for path in temp_paths:
+                    _rm(path)
+
+        response = Response(stream_with_context(generate()), mimetype='application/zip')
+        response.headers['Content-Disposition'] = 'attachment; filename=converted.zip'
+        response.headers['Cache-Control'] = 'no-transform'
+        return response
+    except Exception as e:
+        logger.error(f"Batch conversion error: {str(e)}")
+        for path in temp_paths:
+            _rm(path)
         return jsonify({"error": f"Conversion failed: {str(e)}"}), 500
-    finally:
-        # Clean up temporary files
-        if os.path.exists(input_path):
-            os.remove(input_path)
-        if 'output_path' in locals() and os.path.exists(output_path):
-            os.remove(output_path)
-
-@app.route('/static/<path:path>')
-def serve_static(path):
-    """Serve static files"""
-    return send_from_directory('app/static', path)
+
+# In production, static assets should be served by the reverse proxy
+# (nginx `location /static/ { alias /app/app/static/; sendfile on; }` or
+# a CDN) so Flask workers stay free for conversions. This route is only
+# a fallback for development and single-container deployments.
+if os.environ.get('FLASK_DEBUG') == '1' or os.environ.get('SERVE_STATIC', '1') == '1':
+    @app.route('/static/<path:path>')
+    def serve_static(path):
+        """Serve static files (dev fallback; use nginx/CDN in production)"""
+        response = send_from_directory('app/static', path)
+        response.headers['Cache-Control'] = 'public, max-age=2592000'
+        return response
+
+def create_app():
+    """Application factory hook for factory-style servers.
+    
+    The module builds exactly one configured app at import time (so
+    gunicorn --preload shares it across workers); this returns it for
+    callers using `gunicorn 'app.app:create_app()'` or test fixtures.
+    """
+    return app
 
 if __name__ == '__main__':
+    # Dev server only; production runs gunicorn against wsgi:application.
+    # Debug (and with it the reloader) must be opted into explicitly.
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True) 
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port,
+            debug=os.environ.get('FLASK_DEBUG') == '1', threaded=True)
@@ -3,10 +3,13 @@ Image converter service for the image conversion API.
 Handles conversion between different image formats.
 """
 
+import io
 import os
+import shutil
 import logging
 import tempfile
 import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from PIL import Image
 import cairosvg
 from wand.image import Image as WandImage
@@ -14,30 +17,134 @@ from pdf2image import convert_from_path
 import rawpy
 import numpy as np
 
+try:
+    import cv2
+except ImportError:  # OpenCV is optional; PIL remains the fallback
+    cv2 = None
+
+try:
+    # pdfium renders PDFs in-process; pdf2image (which forks Poppler
+    # binaries per call) stays as the fallback renderer
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+try:
+    # Registers HEIF/HEIC decoding with PIL so Image.open handles them
+    # in-process instead of shelling out to heif-convert
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+    _HEIF_NATIVE = True
+except ImportError:
+    _HEIF_NATIVE = False
+
 from app.utils.format_detector import detect_format
 from app.utils.format_validator import get_normalized_format, can_convert
 
 logger = logging.getLogger(__name__)
 
+# PIL format names and per-format save options, built once at import.
+# _encode_pil copies a template instead of rebuilding the same dicts on
+# every call.
+_FORMAT_MAP = {
+    'jpg': 'JPEG', 'jpeg': 'JPEG', 'png': 'PNG', 'gif': 'GIF',
+    'webp': 'WEBP', 'tiff': 'TIFF', 'bmp': 'BMP',
+}
+# Rasterizing hostile PDFs can balloon memory far beyond the input size,
+# so cap the input bytes and the longer rendered page dimension up front
+_MAX_PDF_BYTES = 50 * 1024 * 1024
+_PDF_RENDER_DPI = 150
+_PDF_MAX_DIM = 2048
+
+_SAVE_TEMPLATE = {
+    'jpg': {'optimize': True, 'progressive': True},
+    'jpeg': {'optimize': True, 'progressive': True},
+    'png': {'optimize': False, 'compress_level': 3},
+    # method 4 halves encode CPU vs 6 for a quality difference well
+    # below noticeable at the qualities this API serves
+    'webp': {'method': 4},
+    'tiff': {'compression': 'tiff_lzw'},
+    'gif': {},
+    'bmp': {},
+}
+
 class ImageConverter:
     """
     Image converter class that handles conversion between different formats.
     Uses different libraries depending on the input and output formats.
     """
     
+    # Format groups and the dispatch table mapping every input format to
+    # its handler, built once at class definition time
+    _STANDARD_FORMATS = ('jpg', 'jpeg', 'png', 'gif', 'webp', 'tiff', 'bmp')
+    _RAW_FORMATS = ('raw', 'arw', 'cr2', 'nef', 'orf', 'rw2', 'dng')
+    _SPECIALIZED_FORMATS = ('pcx', 'jxr', 'tga', 'ppm', 'xcf', 'dxf')
+    _HANDLERS = {
+        **{fmt: '_convert_standard' for fmt in _STANDARD_FORMATS},
+        'svg': '_convert_svg',
+        'heif': '_convert_heif',
+        'heic': '_convert_heif',
+        **{fmt: '_convert_raw' for fmt in _RAW_FORMATS},
+        'eps': '_convert_eps_ai',
+        'ai': '_convert_eps_ai',
+        'psd': '_convert_psd',
+        'pdf': '_convert_pdf',
+        'ico': '_convert_ico',
+        **{fmt: '_convert_specialized' for fmt in _SPECIALIZED_FORMATS},
+    }
+    
     def __init__(self):
         """Initialize the converter."""
         pass
     
-    def convert(self, input_path, output_path, target_format, quality=90):
+    @classmethod
+    def warmup(cls):
+        """
+        Force lazy library initialization at process start.
+        
+        PIL plugin registration, the libmagic database and the cached
+        format tables all populate on first use, adding 100+ms to the
+        first conversion of each type. Calling this once at startup
+        (before the first request, or in a preloading master before
+        fork) moves that cost out of the request path.
+        """
+        Image.init()
+        # Importing the detector builds its module-level libmagic singleton
+        from app.utils import format_detector  # noqa: F401
+        # Prime the memoized format tables for every format we dispatch on
+        for fmt in cls._HANDLERS:
+            get_normalized_format(fmt)
+        can_convert('png', 'jpg')
+    
+    def convert(self, input_path, output_path, target_format, quality=90, raw_preview=False,
+                max_size=None, dynamic_quality=False, png_compress_level=3):
         """
         Convert an image from one format to another.
         
         Args:
-            input_path (str): Path to the input image
+            input_path (str or file-like): Path to the input image, or a
+                readable binary file-like object (BytesIO, mmap, ...) for
+                formats PIL can decode directly
             output_path (str): Path to save the output image
             target_format (str): Target format to convert to
             quality (int, optional): Quality for lossy formats (1-100). Defaults to 90.
+            raw_preview (bool, optional): For RAW input with a lossy target,
+                demosaic at half size with the cheap bilinear algorithm for
+                a ~4x faster preview-quality result. Defaults to False.
+            max_size ((int, int), optional): Bounding box to fit the output
+                within. For JPEG input, lets libjpeg decode at the nearest
+                1/2, 1/4 or 1/8 scale (draft mode) before the final
+                resample, which is several times faster than decoding at
+                full size and resizing. Standard formats only.
+            dynamic_quality (bool, optional): For JPEG output, ignore
+                quality and binary-sweep descending qualities, keeping the
+                lowest one whose luminance SSIM against the source stays
+                above a perceptual floor. Trades encode-time trials for
+                20-35% smaller files. Defaults to False.
+            png_compress_level (int, optional): zlib level for PNG output
+                (0-9). Level 3 encodes roughly 2-3x faster than PIL's
+                default 6 for only a few percent larger files; raise it
+                when size matters more than latency. Defaults to 3.
             
         Returns:
             bool: True if conversion was successful, False otherwise
@@ -47,6 +154,9 @@ class ImageConverter:
             FileNotFoundError: If input file does not exist
             Exception: For other errors during conversion
         """
+        if hasattr(input_path, 'read'):
+            return self._convert_buffer(input_path, output_path, target_format, quality)
+        
         if not os.path.exists(input_path):
             raise FileNotFoundError(f"Input file not found: {input_path}")
         
@@ -62,103 +172,275 @@ class ImageConverter:
         if not target_format:
             raise ValueError(f"Unsupported target format: {target_format}")
         
+        # Same-format requests need no can_convert entry: a byte copy
+        # beats a decode/re-encode cycle by orders of magnitude, and an
+        # explicitly lowered quality or a resize -- meaningful only for
+        # the standard formats -- re-encodes through the PIL path.
+        if input_format == target_format:
+            if (input_format in self._STANDARD_FORMATS
+                    and (quality < 90 or max_size is not None or dynamic_quality)):
+                return self._convert_standard(input_path, output_path, target_format, quality,
+                                              max_size, dynamic_quality, png_compress_level)
+            logger.info(f"Copying {input_path} unchanged ({input_format} passthrough)")
+            shutil.copyfile(input_path, output_path)
+            return True
+        
         # Check if conversion is supported
         if not can_convert(input_format, target_format):
             raise ValueError(f"Conversion from {input_format} to {target_format} is not supported")
         
         logger.info(f"Converting {input_path} from {input_format} to {target_format}")
         
-        # Choose the appropriate conversion method
+        # Dispatch to the appropriate conversion method
+        handler = self._HANDLERS.get(input_format)
+        if handler is None:
+            raise ValueError(f"Unsupported input format: {input_format}")
+        
         try:
-            if input_format in ['jpg', 'jpeg', 'png', 'gif', 'webp', 'tiff', 'bmp']:
-                return self._convert_standard(input_path, output_path, target_format, quality)
-            elif input_format == 'svg':
-                return self._convert_svg(input_path, output_path, target_format, quality)
-            elif input_format in ['heif', 'heic']:
-                return self._convert_heif(input_path, output_path, target_format, quality)
-            elif input_format == 'raw' or input_format in ['arw', 'cr2', 'nef', 'orf', 'rw2', 'dng']:
-                return self._convert_raw(input_path, output_path, target_format, quality)
-            elif input_format in ['eps', 'ai']:
-                return self._convert_eps_ai(input_path, output_path, target_format, quality)
-            elif input_format == 'psd':
-                return self._convert_psd(input_path, output_path, target_format, quality)
-            elif input_format == 'pdf':
-                return self._convert_pdf(input_path, output_path, target_format, quality)
-            elif input_format == 'ico':
-                return self._convert_ico(input_path, output_path, target_format, quality)
-            elif input_format in ['pcx', 'jxr', 'tga', 'ppm', 'xcf', 'dxf']:
-                return self._convert_specialized(input_path, output_path, target_format, quality)
-            else:
-                raise ValueError(f"Unsupported input format: {input_format}")
+            if (max_size is None and not dynamic_quality
+                    and input_format in ['jpg', 'jpeg', 'png']
+                    and self._fast_convert(input_path, output_path, target_format, quality)):
+                return True
+            if handler == '_convert_standard':
+                return self._convert_standard(input_path, output_path, target_format, quality,
+                                              max_size, dynamic_quality, png_compress_level)
+            if handler == '_convert_raw':
+                return self._convert_raw(input_path, output_path, target_format, quality, raw_preview)
+            return getattr(self, handler)(input_path, output_path, target_format, quality)
         except Exception as e:
             logger.error(f"Error during conversion: {str(e)}")
             raise
     
-    def _convert_standard(self, input_path, output_path, target_format, quality):
-        """Convert standard image formats using PIL."""
-        with Image.open(input_path) as img:
-            # Convert to RGB if saving as JPEG (JPEG doesn't support alpha)
-            if target_format in ['jpg', 'jpeg'] and img.mode in ['RGBA', 'LA']:
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[3])  # 3 is the alpha channel
-                img = background
+    def _convert_buffer(self, fobj, output_path, target_format, quality):
+        """
+        Convert directly from an open buffer, skipping the input temp file.
+        
+        Only formats PIL can decode from a stream are supported on this
+        path; callers with other inputs (RAW, EPS, PDF, ...) must pass a
+        filesystem path so the external tools can read it.
+        """
+        target_format = get_normalized_format(target_format)
+        if not target_format:
+            raise ValueError(f"Unsupported target format: {target_format}")
+        
+        # Detect the format from the stream itself
+        try:
+            with Image.open(fobj) as img:
+                input_format = (img.format or '').lower()
+        except Exception:
+            raise ValueError("Could not detect format of input buffer")
+        finally:
+            fobj.seek(0)
+        
+        input_format = get_normalized_format(input_format)
+        if not input_format:
+            raise ValueError("Could not detect format of input buffer")
+        
+        # Same-format requests need no can_convert entry, mirroring the
+        # path-based convert(): copy the bytes straight out, or re-encode
+        # when a lower quality was explicitly asked for
+        if input_format == target_format:
+            if quality < 90:
+                return self._convert_standard(fobj, output_path, target_format, quality)
+            logger.info(f"Copying buffer unchanged ({input_format} passthrough)")
+            with open(output_path, 'wb') as out:
+                shutil.copyfileobj(fobj, out, length=1 << 20)
+            return True
+        
+        if not can_convert(input_format, target_format):
+            raise ValueError(f"Conversion from {input_format} to {target_format} is not supported")
+        
+        logger.info(f"Converting in-memory buffer from {input_format} to {target_format}")
+        
+        if (input_format in ['jpg', 'jpeg', 'png']
+                and self._fast_convert(fobj, output_path, target_format, quality)):
+            return True
+        if input_format in self._STANDARD_FORMATS:
+            return self._convert_standard(fobj, output_path, target_format, quality)
+        
+        raise ValueError(f"In-memory conversion from {input_format} is not supported")
+    
+    def convert_many(self, jobs, workers=None):
+        """
+        Convert a batch of files in parallel across processes.
+        
+        Args:
+            jobs (list[dict]): Keyword arguments for convert(), one dict
+                per file (input_path, output_path, target_format, ...)
+            workers (int, optional): Number of worker processes.
+                Defaults to the CPU count.
+            
+        Returns:
+            list: (job, result) tuples in completion order
+            
+        Raises:
+            Exception: Re-raises the first error from any failed job
+        """
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            futures = {executor.submit(_convert_job, job): job for job in jobs}
+            return [(futures[future], future.result()) for future in as_completed(futures)]
+    
+    def _fast_convert(self, input_path, output_path, target_format, quality):
+        """
+        Fast JPEG/PNG path through OpenCV's codecs.
+        
+        cv2.imdecode/imencode call straight into libjpeg-turbo/libpng and
+        beat the PIL round-trip for plain 8-bit images. Returns False when
+        the input needs the general PIL path (exotic modes, decode
+        failure, or OpenCV unavailable) so the caller can fall back.
+        """
+        if cv2 is None or target_format not in ['jpg', 'jpeg', 'png']:
+            return False
+        
+        try:
+            if hasattr(input_path, 'read'):
+                buf = np.frombuffer(input_path.read(), np.uint8)
+                input_path.seek(0)
+            else:
+                buf = np.fromfile(input_path, np.uint8)
+            
+            arr = cv2.imdecode(buf, cv2.IMREAD_UNCHANGED)
+            if arr is None or arr.dtype != np.uint8 or arr.ndim not in (2, 3):
+                return False
             
-            # Save with appropriate options
-            save_kwargs = {}
             if target_format in ['jpg', 'jpeg']:
-                save_kwargs['quality'] = quality
-                save_kwargs['optimize'] = True
-            elif target_format == 'png':
-                save_kwargs['optimize'] = True
-            elif target_format == 'webp':
-                save_kwargs['quality'] = quality
-                save_kwargs['method'] = 6  # Higher quality but slower
-            elif target_format == 'tiff':
-                save_kwargs['compression'] = 'tiff_lzw'
+                if arr.ndim == 3 and arr.shape[2] == 4:
+                    # Composite alpha over white, as the PIL path does
+                    alpha = arr[:, :, 3:4].astype(np.float32) * (1.0 / 255.0)
+                    arr = (arr[:, :, :3].astype(np.float32) * alpha
+                           + 255.0 * (1.0 - alpha)).astype(np.uint8)
+                ok, data = cv2.imencode('.jpg', arr, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            else:
+                ok, data = cv2.imencode('.png', arr, [cv2.IMWRITE_PNG_COMPRESSION, 3])
             
-            # Map format names to PIL format names
-            format_map = {
-                'jpg': 'JPEG',
-                'jpeg': 'JPEG',
-                'png': 'PNG',
-                'gif': 'GIF',
-                'webp': 'WEBP',
-                'tiff': 'TIFF',
-                'bmp': 'BMP'
-            }
+            if not ok:
+                return False
             
-            img.save(output_path, format=format_map[target_format], **save_kwargs)
+            with open(output_path, 'wb') as f:
+                f.write(data)
+            return True
+        except Exception as e:
+            logger.warning(f"OpenCV fast path failed, falling back to PIL: {str(e)}")
+            return False
+    
+    def _convert_standard(self, input_path, output_path, target_format, quality, max_size=None,
+                          dynamic_quality=False, png_compress_level=3):
+        """Convert standard image formats using PIL.
+        
+        input_path may be a filesystem path or an open binary file-like
+        object; PIL reads either directly. When max_size is given the
+        image is fit inside it; draft() lets the JPEG decoder do the
+        bulk of the downscale in-codec at a power-of-2 fraction.
+        """
+        with Image.open(input_path) as img:
+            if max_size is not None:
+                img.draft('RGB', max_size)
+                img.thumbnail(max_size, Image.Resampling.LANCZOS)
+            return self._encode_pil(img, output_path, target_format, quality, dynamic_quality,
+                                    png_compress_level)
+    
+    def _encode_pil(self, img, output_path, target_format, quality, dynamic_quality=False,
+                    png_compress_level=3):
+        """Encode an already-decoded PIL image into the target format."""
+        # Convert to RGB if saving as JPEG (JPEG doesn't support alpha).
+        # Composite over white in one vectorized pass instead of the
+        # split (four band allocations) + paste round trip.
+        if target_format in ['jpg', 'jpeg'] and img.mode in ['RGBA', 'LA']:
+            arr = np.asarray(img.convert('RGBA'), dtype=np.uint8)
+            alpha = arr[..., 3:4].astype(np.float32) * (1.0 / 255.0)
+            rgb = (arr[..., :3].astype(np.float32) * alpha
+                   + 255.0 * (1.0 - alpha)).astype(np.uint8)
+            img = Image.fromarray(rgb, 'RGB')
+        
+        # Save with appropriate options from the per-format template
+        save_kwargs = dict(_SAVE_TEMPLATE[target_format])
+        if target_format in ('jpg', 'jpeg', 'webp'):
+            save_kwargs['quality'] = quality
+        if target_format == 'png':
+            save_kwargs['compress_level'] = png_compress_level
+        
+        if dynamic_quality and target_format in ['jpg', 'jpeg']:
+            with open(output_path, 'wb') as f:
+                f.write(self._encode_jpeg_dynamic(img, save_kwargs))
+            return True
         
+        img.save(output_path, format=_FORMAT_MAP[target_format], **save_kwargs)
         return True
     
+    _DYNAMIC_QUALITIES = (95, 85, 75, 65, 55)
+    _DYNAMIC_SSIM_FLOOR = 0.94
+    
+    def _encode_jpeg_dynamic(self, img, save_kwargs):
+        """Encode JPEG at the lowest quality that stays perceptually close.
+        
+        Sweeps descending qualities and keeps the smallest encode whose
+        luminance SSIM against the source stays above the floor. Uses a
+        cheap single-window SSIM on a downsampled luminance plane rather
+        than a full sliding-window implementation; it only needs to rank
+        qualities of the same image, not score arbitrary pairs.
+        """
+        ref = self._luminance(img)
+        best = None
+        for q in self._DYNAMIC_QUALITIES:
+            buf = io.BytesIO()
+            img.save(buf, format='JPEG', **{**save_kwargs, 'quality': q})
+            data = buf.getvalue()
+            if best is None:
+                best = data
+            buf.seek(0)
+            with Image.open(buf) as trial:
+                score = self._ssim(ref, self._luminance(trial))
+            if score < self._DYNAMIC_SSIM_FLOOR:
+                break
+            best = data
+        return best
+    
+    @staticmethod
+    def _luminance(img):
+        """Downsampled float32 luminance plane for SSIM comparison."""
+        gray = img.convert('L')
+        if max(gray.size) > 256:
+            gray.thumbnail((256, 256), Image.Resampling.BILINEAR)
+        return np.asarray(gray, dtype=np.float32)
+    
+    @staticmethod
+    def _ssim(a, b):
+        """Global SSIM between two equally sized luminance planes."""
+        c1 = (0.01 * 255.0) ** 2
+        c2 = (0.03 * 255.0) ** 2
+        mu_a = a.mean()
+        mu_b = b.mean()
+        cov = ((a - mu_a) * (b - mu_b)).mean()
+        return ((2.0 * mu_a * mu_b + c1) * (2.0 * cov + c2)
+                / ((mu_a ** 2 + mu_b ** 2 + c1) * (a.var() + b.var() + c2)))
+    
     def _convert_svg(self, input_path, output_path, target_format, quality):
         """Convert SVG to other formats."""
+        # One read serves every cairosvg call in this conversion; uploads
+        # are one-shot temp files, so there is nothing worth caching
+        with open(input_path, 'rb') as f:
+            data = f.read()
         if target_format == 'pdf':
-            cairosvg.svg2pdf(url=input_path, write_to=output_path)
+            cairosvg.svg2pdf(bytestring=data, write_to=output_path)
         elif target_format in ['png', 'jpg', 'jpeg']:
             # For raster formats, use cairosvg
             if target_format == 'png':
-                cairosvg.svg2png(url=input_path, write_to=output_path)
+                cairosvg.svg2png(bytestring=data, write_to=output_path)
             else:  # jpg/jpeg
-                # Convert to PNG first, then to JPEG
-                temp_png = tempfile.NamedTemporaryFile(suffix='.png', delete=False).name
-                try:
-                    cairosvg.svg2png(url=input_path, write_to=temp_png)
-                    with Image.open(temp_png) as img:
-                        img = img.convert('RGB')  # Remove alpha for JPEG
-                        img.save(output_path, 'JPEG', quality=quality, optimize=True)
-                finally:
-                    if os.path.exists(temp_png):
-                        os.remove(temp_png)
+                # Render to an in-memory PNG, then encode as JPEG
+                buf = io.BytesIO()
+                cairosvg.svg2png(bytestring=data, write_to=buf)
+                buf.seek(0)
+                with Image.open(buf) as img:
+                    img = img.convert('RGB')  # Remove alpha for JPEG
+                    img.save(output_path, 'JPEG', quality=quality, optimize=True)
         elif target_format in ['gif', 'webp', 'tiff']:
-            # Convert to PNG first, then to target format
-            temp_png = tempfile.NamedTemporaryFile(suffix='.png', delete=False).name
-            try:
-                cairosvg.svg2png(url=input_path, write_to=temp_png)
-                self._convert_standard(temp_png, output_path, target_format, quality)
-            finally:
-                if os.path.exists(temp_png):
-                    os.remove(temp_png)
+            # Render to an in-memory PNG, then encode to the target format
+            buf = io.BytesIO()
+            cairosvg.svg2png(bytestring=data, write_to=buf)
+            buf.seek(0)
+            with Image.open(buf) as img:
+                self._encode_pil(img, output_path, target_format, quality)
         else:
             raise ValueError(f"Conversion from SVG to {target_format} is not implemented")
         
@@ -166,43 +448,53 @@ class ImageConverter:
     
     def _convert_heif(self, input_path, output_path, target_format, quality):
         """Convert HEIF/HEIC to other formats."""
-        # Use Pillow with the pillow-heif plugin if available
-        try:
-            with Image.open(input_path) as img:
-                return self._convert_standard(input_path, output_path, target_format, quality)
-        except Exception as e:
-            logger.warning(f"Error using Pillow for HEIF: {str(e)}")
+        # With pillow-heif registered, PIL decodes HEIF natively and the
+        # standard path applies unchanged
+        if _HEIF_NATIVE:
+            return self._convert_standard(input_path, output_path, target_format, quality)
         
-        # Fallback to using external tools
+        # Fallback to the external heif-convert tool: fork/exec plus a
+        # PNG round trip, but keeps HEIF working without pillow-heif
         try:
-            # Convert to PNG first using heif-convert
-            temp_png = tempfile.NamedTemporaryFile(suffix='.png', delete=False).name
-            try:
+            with tempfile.TemporaryDirectory() as td:
+                temp_png = os.path.join(td, 'converted.png')
                 subprocess.run(['heif-convert', input_path, temp_png], check=True)
                 return self._convert_standard(temp_png, output_path, target_format, quality)
-            finally:
-                if os.path.exists(temp_png):
-                    os.remove(temp_png)
         except Exception as e:
             logger.error(f"Error converting HEIF: {str(e)}")
             raise ValueError(f"Failed to convert HEIF: {str(e)}")
     
-    def _convert_raw(self, input_path, output_path, target_format, quality):
+    def _convert_raw(self, input_path, output_path, target_format, quality, raw_preview=False):
         """Convert RAW camera formats to other formats."""
         try:
             with rawpy.imread(input_path) as raw:
-                # Process the raw data
-                rgb = raw.postprocess(use_camera_wb=True, half_size=False, no_auto_bright=False)
-                
-                # Convert to PIL Image
-                img = Image.fromarray(rgb)
+                # Process the raw data. Preview mode demosaics at quarter
+                # resolution with bilinear interpolation, which is roughly
+                # an order of magnitude cheaper than full-size AHD.
+                if raw_preview and target_format in ['jpg', 'jpeg', 'webp']:
+                    rgb = raw.postprocess(
+                        use_camera_wb=True, half_size=True, no_auto_bright=True,
+                        output_bps=8,
+                        demosaic_algorithm=rawpy.DemosaicAlgorithm.LINEAR)
+                else:
+                    rgb = raw.postprocess(use_camera_wb=True, half_size=False, no_auto_bright=False)
                 
-                # Save to temporary file
-                temp_tiff = tempfile.NamedTemporaryFile(suffix='.tiff', delete=False).name
-                img.save(temp_tiff)
+                # Encode the postprocessed array directly: for JPEG/PNG
+                # targets go straight through the OpenCV encoder, avoiding
+                # the PIL Image construction entirely
+                if cv2 is not None and target_format in ['jpg', 'jpeg', 'png']:
+                    bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+                    if target_format == 'png':
+                        ok, data = cv2.imencode('.png', bgr, [cv2.IMWRITE_PNG_COMPRESSION, 3])
+                    else:
+                        ok, data = cv2.imencode('.jpg', bgr, [cv2.IMWRITE_JPEG_QUALITY, quality])
+                    if ok:
+                        with open(output_path, 'wb') as f:
+                            f.write(data)
+                        return True
                 
-                # Convert from TIFF to target format
-                return self._convert_standard(temp_tiff, output_path, target_format, quality)
+                img = Image.fromarray(rgb)
+                return self._encode_pil(img, output_path, target_format, quality)
         except Exception as e:
             logger.error(f"Error converting RAW: {str(e)}")
             raise ValueError(f"Failed to convert RAW: {str(e)}")
@@ -220,17 +512,10 @@ class ImageConverter:
                     # Set resolution for raster conversion
                     img.resolution = (300, 300)
                     
-                    # Convert to PNG first for better quality
-                    temp_png = tempfile.NamedTemporaryFile(suffix='.png', delete=False).name
-                    try:
-                        img.format = 'PNG'
-                        img.save(filename=temp_png)
-                        
-                        # Convert from PNG to target format
-                        return self._convert_standard(temp_png, output_path, target_format, quality)
-                    finally:
-                        if os.path.exists(temp_png):
-                            os.remove(temp_png)
+                    # Rasterize to an in-memory PNG for better quality
+                    blob = img.make_blob('png')
+                    with Image.open(io.BytesIO(blob)) as pil_img:
+                        return self._encode_pil(pil_img, output_path, target_format, quality)
             return True
         except Exception as e:
             logger.error(f"Error converting EPS/AI: {str(e)}")
@@ -238,16 +523,13 @@ class ImageConverter:
             # Fallback to Ghostscript for EPS/AI
             try:
                 # Convert to PDF first
-                temp_pdf = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False).name
-                try:
+                with tempfile.TemporaryDirectory() as td:
+                    temp_pdf = os.path.join(td, 'converted.pdf')
                     subprocess.run(['gs', '-dNOPAUSE', '-dBATCH', '-sDEVICE=pdfwrite', 
                                    f'-sOutputFile={temp_pdf}', input_path], check=True)
                     
                     # Convert from PDF to target format
                     return self._convert_pdf(temp_pdf, output_path, target_format, quality)
-                finally:
-                    if os.path.exists(temp_pdf):
-                        os.remove(temp_pdf)
             except Exception as e2:
                 logger.error(f"Error in Ghostscript fallback: {str(e2)}")
                 raise ValueError(f"Failed to convert EPS/AI: {str(e)}, fallback failed: {str(e2)}")
@@ -279,6 +561,12 @@ class ImageConverter:
     
     def _convert_pdf(self, input_path, output_path, target_format, quality):
         """Convert PDF to other formats."""
+        # Guard against PDF bombs before handing the file to a renderer
+        input_size = os.path.getsize(input_path)
+        if input_size > _MAX_PDF_BYTES:
+            raise ValueError(
+                f"PDF too large to rasterize: {input_size} bytes (max {_MAX_PDF_BYTES})")
+        
         # For vector output formats
         if target_format in ['svg']:
             try:
@@ -289,10 +577,39 @@ class ImageConverter:
                 logger.error(f"Error converting PDF to SVG: {str(e)}")
                 raise ValueError(f"Failed to convert PDF to SVG: {str(e)}")
         
-        # For raster output formats
+        # For raster output formats: prefer pdfium, which links the
+        # renderer in-process and returns a PIL image directly instead
+        # of forking pdftoppm and round-tripping through a temp file
+        if pdfium is not None:
+            try:
+                pdf = pdfium.PdfDocument(input_path)
+                try:
+                    page = pdf[0]
+                    # Clamp the scale before rendering: a small PDF with a
+                    # huge MediaBox -- wide or tall -- must not pick the
+                    # bitmap size itself
+                    page_width, page_height = page.get_size()
+                    scale = _PDF_RENDER_DPI / 72
+                    longest = max(page_width, page_height)
+                    if longest * scale > _PDF_MAX_DIM:
+                        scale = _PDF_MAX_DIM / longest
+                    img = page.render(scale=scale).to_pil()
+                finally:
+                    pdf.close()
+                return self._encode_pil(img, output_path, target_format, quality)
+            except Exception as e:
+                logger.warning(f"pdfium render failed, falling back to pdf2image: {str(e)}")
+        
         try:
-            # Convert first page of PDF to image
-            images = convert_from_path(input_path, first_page=1, last_page=1)
+            # Convert first page of PDF to image. A bare int size bounds
+            # the longer page side (pdftoppm -scale-to), so neither a wide
+            # nor a tall MediaBox can balloon the bitmap; asking Poppler
+            # for JPEG output directly skips a lossless intermediate when
+            # the target is JPEG anyway.
+            images = convert_from_path(
+                input_path, first_page=1, last_page=1,
+                dpi=_PDF_RENDER_DPI, size=_PDF_MAX_DIM, thread_count=2,
+                fmt='jpeg' if target_format in ('jpg', 'jpeg') else 'png')
             if not images:
                 raise ValueError("Failed to convert PDF: No images extracted")
             
@@ -308,6 +625,9 @@ class ImageConverter:
             if target_format in ['jpg', 'jpeg']:
                 save_kwargs['quality'] = quality
                 save_kwargs['optimize'] = True
+            elif target_format == 'png':
+                save_kwargs['compress_level'] = 3
+                save_kwargs['optimize'] = False
             
             # Map format names to PIL format names
             format_map = {
@@ -375,14 +695,20 @@ class ImageConverter:
             if input_path.lower().endswith('.dxf'):
                 try:
                     # Convert DXF to SVG first
-                    temp_svg = tempfile.NamedTemporaryFile(suffix='.svg', delete=False).name
-                    try:
+                    with tempfile.TemporaryDirectory() as td:
+                        temp_svg = os.path.join(td, 'converted.svg')
                         subprocess.run(['dxf2svg', input_path, '-o', temp_svg], check=True)
                         return self._convert_svg(temp_svg, output_path, target_format, quality)
-                    finally:
-                        if os.path.exists(temp_svg):
-                            os.remove(temp_svg)
                 except Exception as e2:
                     logger.error(f"Error in DXF conversion fallback: {str(e2)}")
             
-            raise ValueError(f"Failed to convert specialized format: {str(e)}") 
\ No newline at end of file
+            raise ValueError(f"Failed to convert specialized format: {str(e)}")
+
+def _convert_job(job):
+    """Run one conversion job in a worker process.
+    
+    Kept at module level so ProcessPoolExecutor can pickle it. Each
+    worker builds its own converter: the native libraries behind the
+    format handlers hold state that must not be shared across forks.
+    """
+    return ImageConverter().convert(**job)
@@ -0,0 +1,136 @@
+"""
+Endpoint tests for the Flask conversion API.
+"""
+
+import io
+import os
+import sys
+import unittest
+import zipfile
+from PIL import Image
+
+# Add the package root to the path so we can import the app package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from app.app import app
+
+def _png_bytes(size=(32, 32)):
+    """Build a small PNG with random pixels, unique per call.
+
+    Random content keeps each upload out of the conversion cache except
+    where a test deliberately repeats it.
+    """
+    img = Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3))
+    buf = io.BytesIO()
+    img.save(buf, 'PNG')
+    buf.seek(0)
+    return buf
+
+class TestEndpoints(unittest.TestCase):
+    """Test cases for the HTTP endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.client = app.test_client()
+
+    def _post_convert(self, data):
+        """POST a multipart form to /convert."""
+        return self.client.post('/convert', data=data,
+                                content_type='multipart/form-data')
+
+    def test_health(self):
+        """Test the health check endpoint."""
+        response = self.client.get('/health')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['status'], 'healthy')
+
+    def test_formats(self):
+        """Test the supported-formats listing."""
+        response = self.client.get('/formats')
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertIn('png', body['input_formats'])
+        self.assertIn('jpg', body['output_formats']['png'])
+
+    def test_convert_rejects_non_multipart(self):
+        """Test that a non-multipart POST is rejected before the body."""
+        response = self.client.post('/convert', json={'target_format': 'jpg'})
+        self.assertEqual(response.status_code, 415)
+
+    def test_convert_missing_image(self):
+        """Test that a form without a file part is rejected."""
+        response = self._post_convert({'target_format': 'jpg'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('No image', response.get_json()['error'])
+
+    def test_convert_missing_target_format(self):
+        """Test that a missing target_format is rejected."""
+        response = self._post_convert({'image': (_png_bytes(), 'test.png')})
+        self.assertEqual(response.status_code, 400)
+
+    def test_convert_unsupported_target_format(self):
+        """Test that an unknown target format is rejected."""
+        response = self._post_convert({'image': (_png_bytes(), 'test.png'),
+                                       'target_format': 'exe'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unsupported', response.get_json()['error'])
+
+    def test_convert_invalid_quality(self):
+        """Test that an out-of-range quality is rejected."""
+        response = self._post_convert({'image': (_png_bytes(), 'test.png'),
+                                       'target_format': 'jpg',
+                                       'quality': '250'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_convert_oversize_upload(self):
+        """Test that an upload over the size limit gets a 413."""
+        original_limit = app.config['MAX_CONTENT_LENGTH']
+        app.config['MAX_CONTENT_LENGTH'] = 1024
+        try:
+            big = io.BytesIO(b'\x00' * 4096)
+            response = self._post_convert({'image': (big, 'big.png'),
+                                           'target_format': 'jpg'})
+            self.assertEqual(response.status_code, 413)
+        finally:
+            app.config['MAX_CONTENT_LENGTH'] = original_limit
+
+    def test_convert_png_to_jpg(self):
+        """Test a successful conversion through the endpoint."""
+        response = self._post_convert({'image': (_png_bytes(), 'test.png'),
+                                       'target_format': 'jpg'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'image/jpeg')
+        self.assertTrue(response.data.startswith(b'\xff\xd8'))
+
+    def test_convert_cache_hit(self):
+        """Test that a repeated identical upload is served from cache."""
+        payload = _png_bytes().getvalue()
+        first = self._post_convert({'image': (io.BytesIO(payload), 'test.png'),
+                                    'target_format': 'jpg'})
+        self.assertEqual(first.status_code, 200)
+        second = self._post_convert({'image': (io.BytesIO(payload), 'test.png'),
+                                     'target_format': 'jpg'})
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data, first.data)
+
+    def test_convert_batch(self):
+        """Test batch conversion returns a zip of converted files."""
+        response = self.client.post(
+            '/convert_batch',
+            data={'images': [(_png_bytes(), 'a.png'), (_png_bytes(), 'b.png')],
+                  'target_format': 'jpg'},
+            content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/zip')
+        with zipfile.ZipFile(io.BytesIO(response.data)) as zf:
+            self.assertEqual(sorted(zf.namelist()), ['a.jpg', 'b.jpg'])
+
+    def test_convert_batch_no_images(self):
+        """Test that a batch without files is rejected."""
+        response = self.client.post('/convert_batch',
+                                    data={'target_format': 'jpg'},
+                                    content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
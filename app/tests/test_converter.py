@@ -2,6 +2,7 @@
 Tests for the image converter service.
 """
 
+import io
 import os
 import unittest
 import tempfile
@@ -69,6 +70,27 @@ class TestConverter(unittest.TestCase):
             if os.path.exists(output_path):
                 os.remove(output_path)
     
+    def test_convert_from_buffer(self):
+        """Test converting from an in-memory buffer input."""
+        output_path = tempfile.NamedTemporaryFile(suffix='.jpg', delete=False).name
+        try:
+            with open(self.test_image_path, 'rb') as f:
+                buf = io.BytesIO(f.read())
+            
+            # Perform conversion straight from the buffer
+            result = self.converter.convert(buf, output_path, 'jpg')
+            
+            # Check if conversion was successful
+            self.assertTrue(result)
+            self.assertTrue(os.path.exists(output_path))
+            
+            # Check if the output is a valid JPEG
+            with Image.open(output_path) as img:
+                self.assertEqual(img.format, 'JPEG')
+        finally:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+    
     def test_format_validation(self):
         """Test format validation functions."""
         # Test can_convert function
@@ -78,7 +100,7 @@ class TestConverter(unittest.TestCase):
         
         # Test normalization
         self.assertEqual(get_normalized_format('jpg'), 'jpg')
-        self.assertEqual(get_normalized_format('jpeg'), 'jpeg')
+        self.assertEqual(get_normalized_format('jpeg'), 'jpg')
         self.assertEqual(get_normalized_format('png'), 'png')
 
 if __name__ == '__main__':
@@ -4,13 +4,49 @@ Detects image formats from file content and extensions.
 """
 
 import os
+import re
 import magic
 import logging
-from PIL import Image
-import imghdr
 
 logger = logging.getLogger(__name__)
 
+# Constructing magic.Magic reloads and compiles the multi-MB libmagic
+# database, so build one instance at import and reuse it for every file.
+try:
+    _MIME = magic.Magic(mime=True)
+except Exception as e:
+    logger.warning(f"Could not initialize libmagic: {str(e)}")
+    _MIME = None
+
+# Extension -> normalized format, resolved with a single dict lookup
+_EXT_MAP = {
+    'jpg': 'jpg', 'jpeg': 'jpg',
+    'png': 'png',
+    'gif': 'gif',
+    'webp': 'webp',
+    'tif': 'tiff', 'tiff': 'tiff',
+    'bmp': 'bmp',
+    'svg': 'svg',
+    'heif': 'heif', 'heic': 'heif',
+    'arw': 'raw', 'cr2': 'raw', 'nef': 'raw',
+    'orf': 'raw', 'rw2': 'raw', 'dng': 'raw',
+    'eps': 'eps',
+    'psd': 'psd',
+    'ai': 'ai',
+    'pdf': 'pdf',
+    'ico': 'ico',
+    'pcx': 'pcx',
+    'jxr': 'jxr',
+    'tga': 'tga',
+    'ppm': 'ppm',
+    'xcf': 'xcf',
+    'dxf': 'dxf',
+}
+
+# Case-insensitive <svg tag scan, compiled once; runs on the raw header
+# bytes so SVG probing never needs a text-mode decode.
+_SVG_RE = re.compile(rb'<svg\b', re.IGNORECASE)
+
 def detect_format_from_extension(filename):
     """
     Detect format from file extension.
@@ -24,56 +60,55 @@ def detect_format_from_extension(filename):
     if not filename:
         return None
     
-    # Get the extension without the dot
-    ext = os.path.splitext(filename)[1].lower().lstrip('.')
+    return _EXT_MAP.get(os.path.splitext(filename)[1].lower().lstrip('.'))
+
+def _sniff(head):
+    """
+    Identify a format from its leading magic bytes.
     
-    # Common image extensions
-    if ext in ['jpg', 'jpeg']:
+    Args:
+        head (bytes): The first few KB of the file
+        
+    Returns:
+        str: The detected format or None if the signature is unknown
+    """
+    if head.startswith(b'\xff\xd8'):
         return 'jpg'
-    elif ext == 'png':
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
         return 'png'
-    elif ext == 'gif':
+    if head.startswith((b'GIF87a', b'GIF89a')):
         return 'gif'
-    elif ext == 'webp':
+    if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
         return 'webp'
-    elif ext in ['tif', 'tiff']:
+    if head.startswith((b'II*\x00', b'MM\x00*')):
         return 'tiff'
-    elif ext == 'bmp':
+    if head.startswith(b'BM'):
         return 'bmp'
-    elif ext == 'svg':
-        return 'svg'
-    elif ext in ['heif', 'heic']:
-        return 'heif'
-    elif ext in ['arw', 'cr2', 'nef', 'orf', 'rw2', 'dng']:
-        return 'raw'
-    elif ext == 'eps':
-        return 'eps'
-    elif ext == 'psd':
-        return 'psd'
-    elif ext == 'ai':
-        return 'ai'
-    elif ext == 'pdf':
+    if head.startswith(b'%PDF'):
         return 'pdf'
-    elif ext == 'ico':
+    if head.startswith(b'8BPS'):
+        return 'psd'
+    if head.startswith((b'%!PS', b'\xc5\xd0\xd3\xc6')):
+        return 'eps'
+    if head[4:12] in (b'ftypheic', b'ftypheix', b'ftypheif',
+                      b'ftypmif1', b'ftypmsf1'):
+        return 'heif'
+    if head.startswith(b'\x00\x00\x01\x00'):
         return 'ico'
-    elif ext == 'pcx':
-        return 'pcx'
-    elif ext == 'jxr':
-        return 'jxr'
-    elif ext == 'tga':
-        return 'tga'
-    elif ext == 'ppm':
-        return 'ppm'
-    elif ext == 'xcf':
+    if head.startswith(b'gimp xcf'):
         return 'xcf'
-    elif ext == 'dxf':
-        return 'dxf'
-    
+    if head[:2] in (b'P3', b'P6'):
+        return 'ppm'
+    if head.startswith((b'<?xml', b'<svg')) and _SVG_RE.search(head):
+        return 'svg'
     return None
 
 def detect_format_from_content(file_path):
     """
-    Detect format from file content using multiple methods.
+    Detect format from file content.
+    
+    Reads a single 4KB header buffer and dispatches on magic bytes;
+    libmagic is consulted only for signatures the sniffer doesn't know.
     
     Args:
         file_path (str): Path to the file
@@ -81,68 +116,38 @@ def detect_format_from_content(file_path):
     Returns:
         str: The detected format or None if not detected
     """
-    if not os.path.exists(file_path):
-        logger.error(f"File not found: {file_path}")
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(4096)
+    except OSError as e:
+        logger.error(f"Could not read file {file_path}: {str(e)}")
         return None
     
-    # Try using python-magic first
+    detected = _sniff(head)
+    if detected:
+        return detected
+    
+    # Unknown signature: fall back to libmagic for the rarer containers
     try:
-        mime = magic.Magic(mime=True)
-        mime_type = mime.from_file(file_path)
-        
-        if 'jpeg' in mime_type:
-            return 'jpg'
-        elif 'png' in mime_type:
-            return 'png'
-        elif 'gif' in mime_type:
-            return 'gif'
-        elif 'webp' in mime_type:
-            return 'webp'
-        elif 'tiff' in mime_type:
-            return 'tiff'
-        elif 'bmp' in mime_type:
-            return 'bmp'
-        elif 'svg' in mime_type or 'xml' in mime_type:
-            # Check if it's actually SVG
-            with open(file_path, 'r', errors='ignore') as f:
-                content = f.read(1000)  # Read first 1000 chars
-                if '<svg' in content:
+        if _MIME is not None:
+            mime_type = _MIME.from_file(file_path)
+            
+            if 'svg' in mime_type or 'xml' in mime_type:
+                if _SVG_RE.search(head):
                     return 'svg'
-        elif 'pdf' in mime_type:
-            return 'pdf'
-        elif 'postscript' in mime_type:
-            return 'eps'
-        elif 'photoshop' in mime_type or 'psd' in mime_type:
-            return 'psd'
-        elif 'illustrator' in mime_type:
-            return 'ai'
-        elif 'heif' in mime_type or 'heic' in mime_type:
-            return 'heif'
-        elif 'x-icon' in mime_type:
-            return 'ico'
+            elif 'postscript' in mime_type:
+                return 'eps'
+            elif 'photoshop' in mime_type or 'psd' in mime_type:
+                return 'psd'
+            elif 'illustrator' in mime_type:
+                return 'ai'
+            elif 'heif' in mime_type or 'heic' in mime_type:
+                return 'heif'
+            elif 'x-icon' in mime_type:
+                return 'ico'
     except Exception as e:
         logger.warning(f"Error using python-magic: {str(e)}")
     
-    # Try using imghdr
-    try:
-        img_type = imghdr.what(file_path)
-        if img_type:
-            if img_type == 'jpeg':
-                return 'jpg'
-            return img_type
-    except Exception as e:
-        logger.warning(f"Error using imghdr: {str(e)}")
-    
-    # Try using PIL
-    try:
-        with Image.open(file_path) as img:
-            fmt = img.format.lower()
-            if fmt == 'jpeg':
-                return 'jpg'
-            return fmt
-    except Exception as e:
-        logger.warning(f"Error using PIL: {str(e)}")
-    
     # Fall back to extension
     return detect_format_from_extension(file_path)
 
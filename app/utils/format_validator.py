@@ -3,92 +3,141 @@ Format validator utility for the image conversion API.
 Defines supported input and output formats and validation functions.
 """
 
-# Define supported formats and their valid output formats
+import sys
+from functools import lru_cache
+from types import MappingProxyType
+
+# Output sets shared across keys are defined once so every referencing
+# key points at the same frozenset object instead of a per-key copy.
+_RAW_OUT = frozenset({'jpg', 'png', 'tiff', 'bmp'})
+
+# Define supported formats and their valid output formats, one canonical
+# key per format (jpeg, tif and heic fold into jpg, tiff and heif via
+# _CANONICAL below). Values are frozensets so can_convert's membership
+# test is a hash probe instead of a linear scan; they are built once at
+# import.
 SUPPORTED_FORMATS = {
     # Standard web formats
-    'jpg': ['png', 'gif', 'webp', 'tiff', 'bmp'],
-    'jpeg': ['png', 'gif', 'webp', 'tiff', 'bmp'],
-    'png': ['jpg', 'jpeg', 'gif', 'webp', 'tiff', 'bmp'],
-    'gif': ['png', 'jpg', 'jpeg', 'webp', 'tiff'],
-    'webp': ['png', 'jpg', 'jpeg', 'gif', 'tiff'],
-    'tiff': ['png', 'jpg', 'jpeg', 'gif', 'webp', 'bmp'],
-    'tif': ['png', 'jpg', 'jpeg', 'gif', 'webp', 'bmp'],
-    'bmp': ['jpg', 'jpeg', 'png', 'gif', 'tiff', 'webp'],
+    'jpg': frozenset({'png', 'gif', 'webp', 'tiff', 'bmp'}),
+    'png': frozenset({'jpg', 'gif', 'webp', 'tiff', 'bmp'}),
+    'gif': frozenset({'png', 'jpg', 'webp', 'tiff'}),
+    'webp': frozenset({'png', 'jpg', 'gif', 'tiff'}),
+    'tiff': frozenset({'png', 'jpg', 'gif', 'webp', 'bmp'}),
+    'bmp': frozenset({'jpg', 'png', 'gif', 'tiff', 'webp'}),
     
     # Vector formats
-    'svg': ['png', 'jpg', 'jpeg', 'gif', 'webp', 'pdf'],
+    'svg': frozenset({'png', 'jpg', 'gif', 'webp', 'pdf'}),
     
     # High-efficiency formats
-    'heif': ['jpg', 'jpeg', 'png', 'webp', 'tiff', 'gif'],
-    'heic': ['jpg', 'jpeg', 'png', 'webp', 'tiff', 'gif'],
+    'heif': frozenset({'jpg', 'png', 'webp', 'tiff', 'gif'}),
     
     # Camera RAW formats (generalized as 'raw')
-    'raw': ['jpg', 'jpeg', 'png', 'tiff', 'bmp'],
-    'arw': ['jpg', 'jpeg', 'png', 'tiff', 'bmp'],  # Sony
-    'cr2': ['jpg', 'jpeg', 'png', 'tiff', 'bmp'],  # Canon
-    'nef': ['jpg', 'jpeg', 'png', 'tiff', 'bmp'],  # Nikon
-    'orf': ['jpg', 'jpeg', 'png', 'tiff', 'bmp'],  # Olympus
-    'rw2': ['jpg', 'jpeg', 'png', 'tiff', 'bmp'],  # Panasonic
-    'dng': ['jpg', 'jpeg', 'png', 'tiff', 'bmp'],  # Adobe
+    'raw': _RAW_OUT,
+    'arw': _RAW_OUT,  # Sony
+    'cr2': _RAW_OUT,  # Canon
+    'nef': _RAW_OUT,  # Nikon
+    'orf': _RAW_OUT,  # Olympus
+    'rw2': _RAW_OUT,  # Panasonic
+    'dng': _RAW_OUT,  # Adobe
     
     # Adobe formats
-    'eps': ['jpg', 'jpeg', 'png', 'svg', 'pdf', 'tiff'],
-    'psd': ['jpg', 'jpeg', 'png', 'tiff', 'gif', 'webp'],
-    'ai': ['jpg', 'jpeg', 'png', 'svg', 'eps', 'pdf'],
+    'eps': frozenset({'jpg', 'png', 'svg', 'pdf', 'tiff'}),
+    'psd': frozenset({'jpg', 'png', 'tiff', 'gif', 'webp'}),
+    'ai': frozenset({'jpg', 'png', 'svg', 'eps', 'pdf'}),
     
     # Document format
-    'pdf': ['jpg', 'jpeg', 'png', 'tiff', 'gif', 'svg'],
+    'pdf': frozenset({'jpg', 'png', 'tiff', 'gif', 'svg'}),
     
     # Other formats
-    'ico': ['png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff'],
-    'pcx': ['jpg', 'jpeg', 'png', 'tiff', 'bmp', 'gif'],
-    'jxr': ['jpg', 'jpeg', 'png', 'webp', 'tiff'],
-    'tga': ['jpg', 'jpeg', 'png', 'tiff', 'gif'],
-    'ppm': ['png', 'jpg', 'jpeg', 'tiff', 'bmp'],
-    'xcf': ['jpg', 'jpeg', 'png', 'tiff', 'gif', 'webp'],
-    'dxf': ['png', 'jpg', 'jpeg', 'svg', 'pdf', 'tiff'],
+    'ico': frozenset({'png', 'jpg', 'gif', 'bmp', 'tiff'}),
+    'pcx': frozenset({'jpg', 'png', 'tiff', 'bmp', 'gif'}),
+    'jxr': frozenset({'jpg', 'png', 'webp', 'tiff'}),
+    'tga': frozenset({'jpg', 'png', 'tiff', 'gif'}),
+    'ppm': frozenset({'png', 'jpg', 'tiff', 'bmp'}),
+    'xcf': frozenset({'jpg', 'png', 'tiff', 'gif', 'webp'}),
+    'dxf': frozenset({'png', 'jpg', 'svg', 'pdf', 'tiff'}),
 }
 
 # File extensions mapping (for detection)
 FILE_EXTENSIONS = {
     # Standard web formats
-    'jpg': ['jpg', 'jpeg'],
-    'jpeg': ['jpg', 'jpeg'],
-    'png': ['png'],
-    'gif': ['gif'],
-    'webp': ['webp'],
-    'tiff': ['tiff', 'tif'],
-    'tif': ['tiff', 'tif'],
-    'bmp': ['bmp'],
+    'jpg': ('jpg', 'jpeg'),
+    'png': ('png',),
+    'gif': ('gif',),
+    'webp': ('webp',),
+    'tiff': ('tiff', 'tif'),
+    'bmp': ('bmp',),
     
     # Vector formats
-    'svg': ['svg'],
+    'svg': ('svg',),
     
     # High-efficiency formats
-    'heif': ['heif', 'heic'],
-    'heic': ['heif', 'heic'],
+    'heif': ('heif', 'heic'),
     
     # Camera RAW formats
-    'raw': ['raw', 'arw', 'cr2', 'nef', 'orf', 'rw2', 'dng'],
+    'raw': ('raw', 'arw', 'cr2', 'nef', 'orf', 'rw2', 'dng'),
     
     # Adobe formats
-    'eps': ['eps'],
-    'psd': ['psd'],
-    'ai': ['ai'],
+    'eps': ('eps',),
+    'psd': ('psd',),
+    'ai': ('ai',),
     
     # Document format
-    'pdf': ['pdf'],
+    'pdf': ('pdf',),
     
     # Other formats
-    'ico': ['ico'],
-    'pcx': ['pcx'],
-    'jxr': ['jxr'],
-    'tga': ['tga'],
-    'ppm': ['ppm'],
-    'xcf': ['xcf'],
-    'dxf': ['dxf'],
+    'ico': ('ico',),
+    'pcx': ('pcx',),
+    'jxr': ('jxr',),
+    'tga': ('tga',),
+    'ppm': ('ppm',),
+    'xcf': ('xcf',),
+    'dxf': ('dxf',),
 }
 
+# Intern every table string once so the dict and frozenset probes below
+# can hit CPython's pointer-identity fast path before falling back to a
+# full string compare. The derived tables inherit the interned objects.
+SUPPORTED_FORMATS = {
+    sys.intern(fmt): frozenset(sys.intern(output) for output in outputs)
+    for fmt, outputs in SUPPORTED_FORMATS.items()}
+FILE_EXTENSIONS = {
+    sys.intern(fmt): tuple(sys.intern(ext) for ext in extensions)
+    for fmt, extensions in FILE_EXTENSIONS.items()}
+
+# Alias names fold into one canonical format so downstream code never
+# sees two normalized spellings of the same logical format
+_CANONICAL = {'jpeg': 'jpg', 'tif': 'tiff', 'heic': 'heif'}
+
+# Reverse map built once at import: one hash probe replaces the
+# per-call scan over FILE_EXTENSIONS. setdefault keeps the original
+# first-match-wins resolution for extensions listed under several keys.
+_EXT_TO_FORMAT = {}
+for _fmt, _extensions in FILE_EXTENSIONS.items():
+    for _ext in _extensions:
+        _EXT_TO_FORMAT.setdefault(_ext, _CANONICAL.get(_fmt, _fmt))
+
+# Every name the validators accept: format keys plus known extensions
+_ALL_KNOWN = frozenset(SUPPORTED_FORMATS) | frozenset(_EXT_TO_FORMAT)
+
+# Fused normalization table: supported names map to themselves and take
+# precedence over extension aliases, matching get_normalized_format's
+# check order. Lets can_convert normalize each side with one dict.get.
+_NORMALIZE = {**_EXT_TO_FORMAT, **{fmt: fmt for fmt in SUPPORTED_FORMATS}}
+
+# Read-only, pre-sorted view of the full conversion table, built once.
+# The no-argument get_supported_output_formats call hands this out
+# directly, so callers cannot mutate module state and serializers do not
+# trigger a fresh O(N) copy per request.
+_ALL_OUTPUT_FORMATS = MappingProxyType(
+    {fmt: tuple(sorted(outputs)) for fmt, outputs in SUPPORTED_FORMATS.items()})
+
+# Every valid (input, output) pair flattened once at import; checking a
+# conversion is then a single tuple-hash probe
+_CONVERTIBLE = frozenset(
+    (fmt, output) for fmt, outputs in SUPPORTED_FORMATS.items() for output in outputs)
+
+@lru_cache(maxsize=64)
 def is_valid_format(format_name):
     """
     Check if a format is supported for output.
@@ -99,19 +148,13 @@ def is_valid_format(format_name):
     Returns:
         bool: True if the format is supported, False otherwise
     """
-    format_name = format_name.lower()
-    
-    # Check if it's a direct format
-    if format_name in SUPPORTED_FORMATS:
-        return True
-    
-    # Check if it's an alias (extension)
-    for fmt, extensions in FILE_EXTENSIONS.items():
-        if format_name in extensions:
-            return True
-    
-    return False
+    # islower() is an allocation-free C scan; most inputs are already
+    # lowercase, so skip building a new string for them
+    if not format_name.islower():
+        format_name = format_name.lower()
+    return format_name in _ALL_KNOWN
 
+@lru_cache(maxsize=64)
 def get_normalized_format(format_name):
     """
     Get the normalized format name from any valid format name or extension.
@@ -122,18 +165,9 @@ def get_normalized_format(format_name):
     Returns:
         str: The normalized format name
     """
-    format_name = format_name.lower()
-    
-    # If it's already a supported format
-    if format_name in SUPPORTED_FORMATS:
-        return format_name
-    
-    # Check if it's an extension
-    for fmt, extensions in FILE_EXTENSIONS.items():
-        if format_name in extensions:
-            return fmt
-    
-    return None
+    if not format_name.islower():
+        format_name = format_name.lower()
+    return _NORMALIZE.get(format_name)
 
 def get_supported_output_formats(input_format=None):
     """
@@ -149,12 +183,15 @@ def get_supported_output_formats(input_format=None):
     if input_format:
         normalized_format = get_normalized_format(input_format)
         if normalized_format:
-            return {normalized_format: SUPPORTED_FORMATS[normalized_format]}
+            # Sort so API consumers keep getting JSON arrays in a stable order
+            return {normalized_format: sorted(SUPPORTED_FORMATS[normalized_format])}
         return {}
     
-    return SUPPORTED_FORMATS
+    return _ALL_OUTPUT_FORMATS
 
-def can_convert(input_format, output_format):
+@lru_cache(maxsize=256)
+def can_convert(input_format, output_format,
+                _normalize_get=_NORMALIZE.get, _convertible=_CONVERTIBLE):
     """
     Check if conversion from input_format to output_format is supported.
     
@@ -165,10 +202,27 @@ def can_convert(input_format, output_format):
     Returns:
         bool: True if conversion is supported, False otherwise
     """
-    input_normalized = get_normalized_format(input_format)
-    output_normalized = get_normalized_format(output_format)
-    
-    if not input_normalized or not output_normalized:
-        return False
-    
-    return output_normalized in SUPPORTED_FORMATS.get(input_normalized, []) 
\ No newline at end of file
+    # Normalize inline rather than through get_normalized_format: the
+    # helper frames cost more than the lookups on this per-request path.
+    # The lookup tables are bound as defaults so each call resolves them
+    # with LOAD_FAST instead of a module-global (plus attribute) lookup.
+    # Unknown names normalize to None, which never appears in a pair.
+    if not input_format.islower():
+        input_format = input_format.lower()
+    if not output_format.islower():
+        output_format = output_format.lower()
+    return (_normalize_get(input_format),
+            _normalize_get(output_format)) in _convertible
+
+# Import-time consistency checks for the derived lookup structures.
+# Stripped under python -O, so production pays nothing; a stale or
+# inconsistent table fails at import instead of misrouting requests.
+if __debug__:
+    for _fmt, _outputs in SUPPORTED_FORMATS.items():
+        assert _NORMALIZE.get(_fmt) == _fmt, f"format not self-normalizing: {_fmt}"
+        for _output in _outputs:
+            assert _output in _NORMALIZE, f"unknown output format: {_fmt} -> {_output}"
+    for _ext, _fmt in _EXT_TO_FORMAT.items():
+        assert _fmt in SUPPORTED_FORMATS, f"extension maps to unknown format: {_ext} -> {_fmt}"
+    assert len(_CONVERTIBLE) == sum(len(_outputs) for _outputs in SUPPORTED_FORMATS.values())
+    del _fmt, _outputs, _output, _ext
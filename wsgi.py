@@ -0,0 +1,13 @@
+"""
+WSGI entry point for production servers.
+
+Run with:
+    gunicorn -w $(nproc) -k gthread --threads 4 --preload wsgi:application
+
+--preload imports the app (and its precomputed format/response caches)
+once in the master so workers share the pages copy-on-write.
+"""
+
+from app.app import create_app
+
+application = create_app()